@@ -7,8 +7,17 @@ OpenList 下载器包的安装脚本。
 该脚本允许安装 openlist-downloader 包并配置其入口点和依赖项。
 """
 
+import os
+
 from setuptools import setup, find_packages
 
+# 设置 OPENLIST_MYPYC=1 时用 mypyc 把列目录的逐条处理编译为 C 扩展（需要 pip install mypy），
+# 默认安装纯 Python 版本
+ext_modules = []
+if os.environ.get("OPENLIST_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["--follow-imports=skip", "src/openlist_downloader/_listing.py"])
+
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
@@ -23,6 +32,7 @@ setup(
     url="https://github.com/bestmjj/python/openlist-download",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -38,7 +48,12 @@ setup(
     python_requires=">=3.6",
     install_requires=[
         "requests>=2.25.0",
+        "urllib3>=1.26.0",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.7", "aiofiles>=0.6"],
+        "fast": ["orjson>=3.0"],
+    },
     entry_points={
         "console_scripts": [
             "openlist-downloader=openlist_downloader.main:main",
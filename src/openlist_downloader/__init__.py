@@ -6,6 +6,11 @@ OpenList 下载器 - 一个从 OpenList 下载文件的工具。
 
 类：
     OpenListDownloader: 从 OpenList 下载文件的主类
+    AuthenticationError: 登录或重新登录失败时抛出的异常
+
+函数：
+    setup_logging: 配置控制台日志输出
+    shutdown_logging: 写出剩余日志并停止后台写出线程
     
 示例：
     >>> from openlist_downloader import OpenListDownloader
@@ -16,6 +21,6 @@ OpenList 下载器 - 一个从 OpenList 下载文件的工具。
 __version__ = "1.0.0"
 __author__ = "Unknown"
 
-from .downloader import OpenListDownloader
+from .downloader import AuthenticationError, OpenListDownloader, setup_logging, shutdown_logging
 
-__all__ = ["OpenListDownloader"]
\ No newline at end of file
+__all__ = ["AuthenticationError", "OpenListDownloader", "setup_logging", "shutdown_logging"]
\ No newline at end of file
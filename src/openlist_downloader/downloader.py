@@ -2,9 +2,641 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import ssl
+import sys
 import json
+import time
+import base64
+import mmap
+import errno
+import queue
+import select
+import shutil
+import posixpath
+import http.client
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import functools
+import contextlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import quote, urlsplit
+
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # 作为包导入时
+    from ._listing import split_entries
+except ImportError:
+    # main.py 直接作为脚本运行时
+    from _listing import split_entries
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，也不支持 O_DIRECT
+    fcntl = None
+
+try:
+    # 可选依赖，更快的 JSON 解析与序列化：pip install openlist-downloader[fast]
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # 可选依赖，用于异步下载：pip install openlist-downloader[async]
+    import aiohttp
+    import aiofiles
+except ImportError:
+    aiohttp = None
+    aiofiles = None
+
+LOGGER_NAME = "openlist_downloader"
+# setup_logging 启动的后台日志写出线程
+_log_listener = None
+
+
+class AuthenticationError(Exception):
+    """
+    登录失败（包括令牌失效后重新登录失败）时抛出。
+
+    与单个文件或单页的请求错误不同，认证失败后的所有请求都会失败，
+    因此各请求方法不会把它当作普通错误记录后继续，而是向上抛出并中止 run()。
+    """
+
+
+def setup_logging(verbose=False):
+    """
+    配置控制台日志输出，由命令行入口在启动时调用一次。
+
+    消息本身带有 [INFO]/[DEBUG] 等标签，因此只输出消息文本。默认级别为 INFO：
+    DEBUG 消息在级别检查处即被丢弃，不会格式化字符串，也不会争用 stdout 的锁。
+    第三方库（urllib3 等）的日志保持 WARNING 级别，--verbose 时也不会刷屏。
+
+    本包的日志经 QueueHandler 放入队列，由单个后台线程（QueueListener）编码并
+    写入 stdout：下载线程只需格式化消息并入队，不再互相争用 stdout 的锁；
+    进程退出或调用 shutdown_logging 时队列中剩余的消息会被全部写出。
+    重复调用只更新日志级别。
+
+    Args:
+        verbose (bool): 为 True 时输出 DEBUG 消息
+    """
+    global _log_listener
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    if _log_listener is not None:
+        return
+
+    if hasattr(sys.stdout, "reconfigure"):
+        # 终端编码无法表示的字符替换输出，而不是抛出 UnicodeEncodeError
+        sys.stdout.reconfigure(errors="replace")
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log_queue = queue.Queue()
+    _log_listener = logging.handlers.QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(shutdown_logging)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    # 已经由队列输出，不再传给根记录器重复输出
+    logger.propagate = False
+
+
+def shutdown_logging():
+    """
+    停止 setup_logging 启动的后台写出线程，先写出队列中剩余的全部消息。
+
+    之后本包的日志改为在调用线程中直接写入 stdout，因此在它之后输出的内容
+    （如退出前的错误信息、未捕获异常的回溯）不会排到尚未写出的日志前面。
+    未调用过 setup_logging 或已经停止时不做任何事。
+    """
+    global _log_listener
+    if _log_listener is None:
+        return
+    listener, _log_listener = _log_listener, None
+    listener.stop()
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler) and handler.queue is listener.queue:
+            logger.removeHandler(handler)
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+
+
+def _json_loads(data):
+    """
+    解析 JSON 文本（bytes 或 str），安装了 orjson 时使用 orjson。
+
+    解析失败时抛出 ValueError（orjson.JSONDecodeError 也是其子类），
+    与 requests 的 Response.json() 保持一致。
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj):
+    """
+    把对象序列化为紧凑的 UTF-8 JSON（bytes），安装了 orjson 时使用 orjson。
+
+    用作请求体时代替 requests 的 json= 参数，后者总是使用标准库 json。
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _parse_json(resp):
+    """解析 requests 响应的 JSON 正文，跳过 Response.json() 的编码探测。"""
+    return _json_loads(resp.content)
+
+
+def _token_expiry(token):
+    """
+    读取 OpenList 令牌（JWT）中的过期时间。
+
+    Returns:
+        int or None: exp 声明（Unix 时间戳），令牌无法解析时返回 None
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(_json_loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+# 超过该大小（字节）的响应由后台线程写盘，使网络接收与磁盘写入重叠
+WRITE_BEHIND_THRESHOLD = 8 * 1024 * 1024
+# 后台写盘队列中最多等待写入的数据块数量
+WRITE_BEHIND_DEPTH = 8
+# 超过该大小（字节）的文件写完后从页缓存中丢弃；启用 direct_io 时改用 O_DIRECT 写盘
+DIRECT_IO_THRESHOLD = 64 * 1024 * 1024
+# 超过该大小（字节）且服务器支持 Range 的文件分段并行下载
+RANGED_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+# 超过该大小（字节）的明文 HTTP 响应通过 splice 从套接字直接搬运到文件
+ZERO_COPY_THRESHOLD = 8 * 1024 * 1024
+# 超过该大小（字节）的文件在写入前预分配磁盘空间
+PREALLOCATE_THRESHOLD = 1024 * 1024
+# 从响应正文复制到文件时每次读取的块大小（字节）
+COPY_BUFFER_SIZE = 1024 * 1024
+# 下载任务按直链主机分组排序时的窗口大小（任务数）
+HOST_GROUP_WINDOW = 1024
+# 文件列表（JSON Lines，每行一个文件）
+FILELIST_PATH = "filelist.jsonl"
+# 旧版本保存的整体 JSON 文件列表，--download-only 时自动转换为 FILELIST_PATH
+LEGACY_FILELIST_PATH = "filelist.json"
+
+
+def _copy_response(resp, dst, pool=None):
+    """
+    把流式响应的正文复制到 dst（任何带 write 方法的对象）。
+
+    默认直接从 urllib3 的原始响应按 COPY_BUFFER_SIZE 读取，复制循环在
+    shutil.copyfileobj 中完成，比逐个处理 iter_content 的 64KB 块少得多的
+    Python 层迭代和 bytes 分配。decode_content 保证压缩传输时写入的是解压后的内容。
+
+    提供 pool 且响应未压缩时，改为用底层 http.client 响应的 readinto 直接读入
+    池中借出的缓冲区：urllib3 的 read() 每次都会新分配并复制一块数据，而这里
+    每个数据块都不再分配内存。dst 为 _WriteBehindWriter 时缓冲区在后台写完后才归还。
+
+    Args:
+        resp (requests.Response): 以 stream=True 发起、尚未读取正文的响应
+        dst: 写入目标
+        pool (_BufferPool): 共享缓冲区池，为 None 时使用 shutil.copyfileobj
+    """
+    fp = getattr(resp.raw, "_fp", None)
+    if (pool is None or not hasattr(fp, "readinto")
+            or resp.headers.get("Content-Encoding", "identity").lower() != "identity"):
+        resp.raw.decode_content = True
+        shutil.copyfileobj(resp.raw, dst, COPY_BUFFER_SIZE)
+        return
+
+    deferred = isinstance(dst, _WriteBehindWriter)
+    while True:
+        buf = pool.get()
+        release = functools.partial(pool.put, buf)
+        try:
+            n = fp.readinto(buf)
+            if n and deferred:
+                dst.write(memoryview(buf)[:n], release)
+                continue
+            if n:
+                dst.write(memoryview(buf)[:n])
+        except BaseException:
+            release()
+            raise
+        release()
+        if not n:
+            break
+    # http.client 的 readinto 在连接提前关闭时只返回 0 而不报错，这里按 Content-Length
+    # 检查是否读完，否则不完整的 .part 文件会被当作下载成功改名为目标文件
+    if fp.length:
+        raise http.client.IncompleteRead(b"", fp.length)
+    # 正文是绕过 urllib3 读完的，需要手动把连接放回连接池，否则关闭响应时连接会被断开
+    resp.raw.release_conn()
+
+
+def _count_lines(path):
+    """统计文件的行数，按块读取，不逐行创建对象。"""
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(functools.partial(f.read, COPY_BUFFER_SIZE), b""))
+
+
+def _group_by_host(tasks, window=HOST_GROUP_WINDOW):
+    """
+    在固定大小的窗口内按直链主机对下载任务做稳定排序。
+
+    同一主机的任务相邻提交，连接池里到该主机的长连接能被连续复用，而不是在多个
+    CDN 主机之间来回切换；窗口有界，不需要为排序读入整个文件列表。
+
+    Args:
+        tasks (iterable): (remote_path, local_path, expected_size, direct_url, checked) 元组的可迭代对象
+        window (int): 每次排序的任务数
+
+    Yields:
+        tuple: 与输入相同的任务元组
+    """
+    def host(task):
+        return urlsplit(task[3]).netloc if task[3] else ""
+
+    batch = []
+    for task in tasks:
+        batch.append(task)
+        if len(batch) >= window:
+            batch.sort(key=host)
+            yield from batch
+            batch = []
+    batch.sort(key=host)
+    yield from batch
+
+
+@contextlib.contextmanager
+def _null_context():
+    """什么都不做的上下文管理器（contextlib.nullcontext 需要 Python 3.7）。"""
+    yield
+
+
+def _local_size(path):
+    """返回本地文件的大小，文件不存在或无法访问时返回 0。只需一次 stat 系统调用。"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _drop_page_cache(fd):
+    """
+    把已写入的内容落盘后通知内核丢弃该文件的页缓存。
+
+    POSIX_FADV_DONTNEED 只会丢弃干净页，因此先 fdatasync 把脏页写回；
+    一次性写入的大文件不再挤占其他进程的缓存。平台不支持时静默跳过。
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+
+
+def _preallocate(fd, size):
+    """
+    为文件一次性预分配 size 字节的磁盘空间。
+
+    让文件系统一次分配连续的区段，而不是随每个 64KB 写入反复扩展 inode。
+    平台或文件系统不支持时静默跳过。
+
+    Returns:
+        bool: 成功预分配时返回 True
+    """
+    if size < PREALLOCATE_THRESHOLD or not hasattr(os, "posix_fallocate"):
+        return False
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError:
+        return False
+    return True
+
+
+class _WriteBehindWriter:
+    """
+    在后台线程中执行写入的文件包装器。
+
+    write() 只把数据块放入有界队列即返回，由后台线程负责写盘，
+    这样下一块数据的网络接收可以与上一块数据的磁盘写入同时进行。
+    """
+
+    def __init__(self, f, depth=WRITE_BEHIND_DEPTH):
+        """
+        Args:
+            f: 已打开的二进制文件对象
+            depth (int): 队列中最多等待写入的数据块数量。默认为 WRITE_BEHIND_DEPTH，
+                按 COPY_BUFFER_SIZE 大小的数据块计算，每个文件最多缓存约 8MB。
+        """
+        self._f = f
+        self._queue = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            chunk, on_done = item
+            # 出错后继续消费队列，避免生产者阻塞在 put() 上
+            if self._error is None:
+                try:
+                    self._f.write(chunk)
+                except Exception as e:
+                    self._error = e
+            if on_done is not None:
+                on_done()
+
+    def write(self, chunk, on_done=None):
+        """
+        把数据块放入写入队列。
+
+        Args:
+            chunk: 要写入的数据（bytes 或 memoryview）
+            on_done (callable): 该数据块写完（或因之前的错误被丢弃）后在后台线程中调用，
+                用于归还 chunk 所在的缓冲区
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((chunk, on_done))
+
+    def close(self):
+        """等待所有排队的数据写完，并抛出后台线程中发生的写入错误。"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+class _BufferPool:
+    """
+    线程间共享的定长缓冲区池。
+
+    缓冲区按需创建，总数不超过 limit；全部借出时 get() 阻塞到有缓冲区归还，
+    因此所有下载线程读取正文占用的内存有固定上限。后进先出，最近归还的
+    缓冲区更可能仍在 CPU 缓存中。
+    """
+
+    def __init__(self, size, limit):
+        """
+        Args:
+            size (int): 每个缓冲区的字节数
+            limit (int): 最多创建的缓冲区数量
+        """
+        self.size = size
+        self._limit = limit
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pool = queue.LifoQueue()
+
+    def get(self):
+        """借出一个缓冲区（bytearray）。"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._limit:
+                self._created += 1
+                return bytearray(self.size)
+        return self._pool.get()
+
+    def put(self, buf):
+        """归还 get() 借出的缓冲区。"""
+        self._pool.put(buf)
+
+
+class _DirectFile:
+    """
+    以 O_DIRECT 打开的只写文件，写入时绕过页缓存。
+
+    O_DIRECT 要求缓冲区地址、长度和文件偏移都按块对齐，因此数据先累积到一块
+    按页对齐的 mmap 缓冲区中，满了再整块写出；关闭时把不足一块的尾部补零写出，
+    再截断到真实写入的长度。
+    """
+
+    BUFFER_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, path, size=0):
+        """
+        Args:
+            path (str): 要写入的本地路径
+            size (int): 预期的文件大小（字节），用于预分配空间
+
+        异常：
+            OSError: 文件系统不支持 O_DIRECT（如 tmpfs）时抛出，errno 为 EINVAL。
+        """
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+        _preallocate(self._fd, size)
+        self._buf = mmap.mmap(-1, self.BUFFER_SIZE)
+        self._used = 0
+        self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, chunk):
+        view = memoryview(chunk)
+        while view:
+            n = min(len(view), self.BUFFER_SIZE - self._used)
+            self._buf[self._used:self._used + n] = view[:n]
+            self._used += n
+            self._size += n
+            view = view[n:]
+            if self._used == self.BUFFER_SIZE:
+                self._flush(self.BUFFER_SIZE)
+
+    def _flush(self, length):
+        with memoryview(self._buf) as view:
+            done = 0
+            while done < length:
+                try:
+                    done += os.write(self._fd, view[done:length])
+                except OSError as e:
+                    # 部分文件系统允许以 O_DIRECT 打开却拒绝直接写入，此时退回普通写入
+                    if e.errno != errno.EINVAL:
+                        raise
+                    flags = fcntl.fcntl(self._fd, fcntl.F_GETFL)
+                    if not flags & os.O_DIRECT:
+                        raise
+                    fcntl.fcntl(self._fd, fcntl.F_SETFL, flags & ~os.O_DIRECT)
+        self._used = 0
+
+    def truncate(self):
+        """close() 总会截断到实际写入的长度，这里无需处理。"""
+
+    def close(self):
+        if self._fd < 0:
+            return
+        try:
+            if self._used:
+                padded = -(-self._used // mmap.PAGESIZE) * mmap.PAGESIZE
+                self._buf[self._used:padded] = bytes(padded - self._used)
+                self._flush(padded)
+            os.ftruncate(self._fd, self._size)
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+            self._buf.close()
+
+
+class _Progress:
+    """
+    下载进度计数器，每完成 every 个文件以及全部完成时输出一次进度。
+
+    只在分发任务的线程（或事件循环）中调用，不需要加锁。
+    """
+
+    def __init__(self, log, total, every=20):
+        """
+        Args:
+            log (logging.Logger): 输出进度的日志记录器
+            total (int): 文件总数
+            every (int): 每完成多少个文件输出一次。默认为 20。
+        """
+        self.log = log
+        self.total = total
+        self.every = every
+        self.completed = 0
+
+    def advance(self, count=1):
+        """记录完成了 count 个文件（下载完成或被跳过）。"""
+        for _ in range(count):
+            self.completed += 1
+            if self.completed % self.every == 0 or self.completed == self.total:
+                self.log.info("[PROGRESS] 📥 %s/%s", self.completed, self.total)
+
+
+class _HostLimiter:
+    """
+    按直链主机限制并发下载数，并根据响应延迟以 AIMD（加性增、乘性减）自动调整。
+
+    每个主机的并发上限从 max_per_host 开始。记录每次请求到收到响应头的延迟的
+    指数加权平均（EWMA），并以缓慢衰减的最低值作为基线：出现更低的值时立即下调，
+    否则逐渐回升到当前水平，一次偶然的快速响应不会让基线永久偏低。
+    每观察满一个窗口（当前上限个请求）调整一次：窗口内服务器返回过 429/503，
+    或每个样本的 EWMA 都超过基线的两倍（持续变慢而不是偶然抖动）时上限减半，
+    否则加一，直到回到 max_per_host。
+    """
+
+    def __init__(self, log, max_per_host, alpha=0.2, decay=0.02):
+        """
+        Args:
+            log (logging.Logger): 输出调整信息的日志记录器
+            max_per_host (int): 每个主机的最大并发数
+            alpha (float): EWMA 的平滑系数。默认为 0.2。
+            decay (float): 基线每个样本向当前 EWMA 回升的比例。默认为 0.02。
+        """
+        self.log = log
+        self.max_per_host = max(1, max_per_host)
+        self.alpha = alpha
+        self.decay = decay
+        self._cond = threading.Condition()
+        self._hosts = {}
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {
+                "limit": self.max_per_host, "active": 0, "ewma": None, "baseline": None,
+                "samples": 0, "inflated": 0, "congested": False
+            }
+        return state
+
+    @contextlib.contextmanager
+    def slot(self, host):
+        """占用 host 的一个并发名额，名额用完时阻塞到其他下载结束。"""
+        with self._cond:
+            state = self._state(host)
+            while state["active"] >= state["limit"]:
+                self._cond.wait()
+            state["active"] += 1
+        try:
+            yield
+        finally:
+            self._release(state, 1)
+
+    @contextlib.contextmanager
+    def extra_slots(self, host, wanted):
+        """
+        在不阻塞的前提下为 host 额外占用至多 wanted 个名额（用于分段下载的其余分段）。
+
+        调用方已经持有一个名额，若在这里阻塞等待，所有线程可能互相等待而死锁，
+        因此只占用当前空闲的名额，可能一个也没有。
+
+        Yields:
+            int: 实际占用的名额数
+        """
+        with self._cond:
+            state = self._state(host)
+            granted = max(0, min(wanted, state["limit"] - state["active"]))
+            state["active"] += granted
+        try:
+            yield granted
+        finally:
+            if granted:
+                self._release(state, granted)
+
+    def _release(self, state, count):
+        with self._cond:
+            state["active"] -= count
+            self._cond.notify_all()
+
+    def record(self, host, latency, congested=False):
+        """
+        记录一次请求的延迟并按需调整该主机的并发上限。
+
+        Args:
+            host (str): 直链主机
+            latency (float): 成功响应从发出请求到收到响应头的秒数；
+                错误响应的延迟不能代表正常传输，传 None 只记录 congested
+            congested (bool): 服务器是否明确表示过载（429/503）
+        """
+        with self._cond:
+            state = self._state(host)
+            if latency is not None:
+                ewma = state["ewma"]
+                ewma = state["ewma"] = latency if ewma is None else ewma + self.alpha * (latency - ewma)
+                baseline = state["baseline"]
+                if baseline is None or ewma < baseline:
+                    baseline = ewma
+                else:
+                    baseline += self.decay * (ewma - baseline)
+                state["baseline"] = baseline
+                state["inflated"] += ewma > 2 * baseline
+            state["samples"] += 1
+            state["congested"] |= congested
+            # 每次调整后至少观察一个窗口再调整，同一次拥塞不会被连续减半
+            if state["samples"] < state["limit"]:
+                return
+            backoff = state["congested"] or state["inflated"] == state["samples"]
+            state["samples"] = state["inflated"] = 0
+            state["congested"] = False
+            if backoff:
+                if state["limit"] > 1:
+                    state["limit"] //= 2
+                    self.log.debug("[DEBUG] 🐢 %s 延迟升高，并发降为 %s", host, state["limit"])
+            elif state["limit"] < self.max_per_host:
+                state["limit"] += 1
+                self._cond.notify_all()
 
 
 class OpenListDownloader:
@@ -22,13 +654,41 @@ class OpenListDownloader:
             config_path (str): 配置 JSON 文件的路径。默认为 "config.json"。
         """
         self.config_path = config_path
+        self.log = logging.getLogger(LOGGER_NAME)
+        if not self.log.handlers and not logging.getLogger().handlers:
+            # 作为库使用且调用方没有配置日志时，保持原来输出到控制台的行为；
+            # 只给本包的记录器加一个处理器，不改动根记录器、sys.stdout 等全局状态
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log.addHandler(handler)
+            if self.log.level == logging.NOTSET:
+                self.log.setLevel(logging.INFO)
         self.load_config()
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.api_session = requests.Session()
+        self.api_session.headers.update({
             "Content-Type": "application/json",
             "User-Agent": "openlist-downloader/1.0"
         })
+        # 所有直链（raw_url 和 /d 链接）都走下载会话：直链自带签名，不需要令牌，
+        # 也不应带上 JSON 的 Content-Type；令牌只随 API 请求发送，不会泄露给第三方存储
+        self.dl_session = requests.Session()
+        self.dl_session.headers.update({"User-Agent": "openlist-downloader/1.0"})
         self.token = None
+        # 本次运行中已确认存在的远程目录，上传时避免重复 mkdir
+        self._ensured_dirs = set()
+        # 正在创建中的远程目录 -> 完成事件，让并发上传同一目录的线程等待同一次 mkdir
+        self._pending_dirs = {}
+        self._ensured_dirs_lock = threading.Lock()
+        # 本次运行中已创建的本地目录，同一目录下的文件不再重复 makedirs
+        self._local_dirs = set()
+        self._login_lock = threading.Lock()
+        # 下载线程共享的读缓冲区池，由 run() 按线程数创建
+        self._buffer_pool = None
+        # 按主机的下载并发限制，由 run() 按线程数创建
+        self._host_limiter = None
+        # 当前用户的根目录（/api/me 的 base_path），由 run() 在下载前查询；
+        # 未知时不构造 /d 链接
+        self._base_path = None
 
     def load_config(self):
         """
@@ -44,13 +704,18 @@ class OpenListDownloader:
         可选配置键及其默认值：
         - page_size: 每页的项目数（默认：200）
         - timeout: 请求超时时间（秒）（默认：30）
+        - max_retries: 连接错误、429 和 5xx 响应的最大重试次数（默认：3）
         - skip_existing: 跳过现有文件（默认：True）
+        - list_workers: 并发列目录的线程数（默认：32）
+        - range_parts: 大文件分段并行下载的段数，小于 2 时禁用（默认：8）
+        - token_cache: 在 ~/.cache/openlist-downloader 中缓存登录令牌供下次运行复用（默认：True）
+        - direct_io: 大文件以 O_DIRECT 写盘，完全绕过页缓存（默认：False）
         - upload: 上传配置对象（可选）
           - local_path: 本地待上传文件目录
           - remote_upload_path: 远程上传目标目录
         """
-        with open(self.config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        with open(self.config_path, "rb") as f:
+            config = _json_loads(f.read())
         self.openlist_url = config["openlist_url"].strip().rstrip("/")
         self.username = config.get("username")
         self.password = config.get("password")
@@ -59,266 +724,1070 @@ class OpenListDownloader:
         self.local_save_dir = config["local_save_dir"]
         self.page_size = config.get("page_size", 200)
         self.timeout = config.get("timeout", 30)
+        self.max_retries = config.get("max_retries", 3)
         self.skip_existing = config.get("skip_existing", True)
+        self.list_workers = config.get("list_workers", 32)
+        self.range_parts = config.get("range_parts", 8)
+        self.token_cache = config.get("token_cache", True)
+        self.direct_io = config.get("direct_io", False)
         self.upload_config = config.get("upload", {})
 
+    def _mount_adapters(self, workers):
+        """
+        按并发线程数为各会话挂载连接池适配器和重试策略。
+
+        requests 默认每个主机只保留 10 个连接。API 主机、raw_url 所在主机和分段下载
+        都会占用连接，池太小时多余的连接会被丢弃，下一次请求又要重新进行 TCP/TLS 握手。
+        瞬时错误（429 和 5xx）以指数退避自动重试；重试耗尽后返回最后一次响应，
+        由调用方按原有逻辑处理状态码。
+
+        Args:
+            workers (int): 并发线程数
+        """
+        retries = Retry(
+            total=self.max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD", "POST", "PUT"],
+            raise_on_status=False
+        )
+        # 分段下载时每个线程最多同时占用 range_parts 个连接
+        pool_maxsize = max(64, workers * max(4, self.range_parts))
+        for session in (self.api_session, self.dl_session):
+            adapter = HTTPAdapter(
+                pool_connections=max(32, workers * 2),
+                pool_maxsize=pool_maxsize,
+                max_retries=retries
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+    @property
+    def session(self):
+        """
+        API 会话的旧名称，保留以兼容直接访问该属性的调用方。
+
+        Returns:
+            requests.Session: 即 api_session
+        """
+        return self.api_session
+
     def login(self):
         """
         与 OpenList 实例进行身份验证。
         
         使用提供的令牌或用户名/密码凭据与 OpenList 实例进行身份验证。
-        身份验证成功后，使用授权令牌更新会话头。
-        
+        启用 token_cache 时，优先使用上次登录缓存在磁盘上、且仍未过期的令牌，
+        省去一次登录请求。身份验证成功后，使用授权令牌更新会话头。
+
         异常：
             ValueError: 当未提供令牌且缺少用户名或密码时抛出。
             Exception: 登录请求失败或返回错误时抛出。
         """
-        if self.token:
-            self.session.headers.update({"Authorization": self.token})
-            self.print("[INFO] 使用提供的令牌。")
-            return
+        if self.token:
+            self.api_session.headers.update({"Authorization": self.token})
+            self.log.info("[INFO] 使用提供的令牌。")
+            return
+
+        if not self.username or not self.password:
+            raise ValueError("config.json 中缺少用户名/密码")
+
+        if self.token_cache:
+            token = self._load_cached_token()
+            if token:
+                self.token = token
+                self.api_session.headers.update({"Authorization": self.token})
+                self.log.info("[INFO] 使用缓存的令牌。")
+                return
+
+        self._password_login()
+
+    def _password_login(self):
+        """
+        使用用户名/密码登录并更新会话头，启用 token_cache 时同时写入缓存。
+
+        异常：
+            AuthenticationError: 登录请求失败或返回错误时抛出。
+        """
+        self.log.info("[INFO] 正在登录到 %s...", self.openlist_url)
+        url = f"{self.openlist_url}/api/auth/login"
+        payload = {"username": self.username, "password": self.password}
+        try:
+            resp = self.api_session.post(url, data=_json_dumps(payload), timeout=self.timeout)
+            try:
+                data = _parse_json(resp)
+            except ValueError:
+                # 非 JSON 响应（空正文或 HTML 错误），提供有用的信息
+                raise Exception(f"登录失败：非 JSON 响应（状态 {resp.status_code}）：{resp.text!r}")
+
+            if data.get("code") == 200:
+                # 先更新会话头再更新 self.token，其他线程看到新令牌时请求头已经生效
+                token = data["data"]["token"]
+                self.api_session.headers.update({"Authorization": token})
+                self.token = token
+                self.log.info("[INFO] 登录成功。")
+            else:
+                raise Exception(f"登录失败：{data}")
+        except Exception as e:
+            raise AuthenticationError(f"[ERROR] 登录请求失败：{e}") from e
+
+        if self.token_cache:
+            self._save_cached_token()
+
+    def _relogin(self, stale_token):
+        """
+        令牌失效后重新登录。
+
+        多个线程可能同时发现同一个令牌失效，只有第一个线程真正发起登录，
+        其余线程看到令牌已经更新后直接返回。
+
+        Args:
+            stale_token (str): 发起请求时使用的、已失效的令牌
+        """
+        with self._login_lock:
+            if self.token != stale_token:
+                return
+            self._clear_cached_token()
+            self._password_login()
+
+    def _token_cache_path(self):
+        """返回当前 OpenList 实例的令牌缓存文件路径。"""
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        parts = urlsplit(self.openlist_url)
+        name = re.sub(r"[^\w.-]", "_", parts.netloc + parts.path)
+        return os.path.join(cache_home, "openlist-downloader", f"{name}.json")
+
+    def _load_cached_token(self):
+        """
+        读取磁盘上缓存的令牌。
+
+        Returns:
+            str or None: 属于当前用户且 60 秒内不会过期的令牌，否则返回 None
+        """
+        try:
+            with open(self._token_cache_path(), "rb") as f:
+                cached = _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get("username") != self.username:
+            return None
+        if cached.get("expires_at", 0) - time.time() <= 60:
+            return None
+        return cached.get("token")
+
+    def _save_cached_token(self):
+        """
+        把当前令牌及其过期时间写入缓存文件。
+
+        先写临时文件再用 os.replace 原子替换，文件权限为 0600。
+        令牌中读不到过期时间时不缓存。
+        """
+        expires_at = _token_expiry(self.token)
+        if expires_at is None:
+            return
+        path = self._token_cache_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(_json_dumps({"username": self.username, "token": self.token, "expires_at": expires_at}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.log.warning("[WARN] 无法写入令牌缓存：%s", e)
+
+    def _clear_cached_token(self):
+        """删除缓存的令牌。"""
+        try:
+            os.remove(self._token_cache_path())
+        except OSError:
+            pass
+
+    def _api_post(self, path, payload):
+        """
+        向 OpenList API 发送 JSON POST 请求并解析响应。
+
+        Args:
+            path (str): API 路径，如 "/api/fs/get"
+            payload (dict): 请求体
+
+        Returns:
+            tuple: (requests.Response, dict or None)，响应不是 JSON 时第二项为 None
+        """
+        return self._api_request("POST", path, data=_json_dumps(payload))
+
+    def _api_request(self, method, path, **kwargs):
+        """
+        向 OpenList API 发送请求并解析 JSON 响应。
+
+        令牌失效（HTTP 401 或响应中 code 为 401）时重新登录并重试一次，
+        这样缓存的令牌在服务端被提前吊销时也能自动恢复。重试会原样重发请求体，
+        因此 data 必须是可重复读取的对象（bytes、memoryview 等）。
+
+        Args:
+            method (str): HTTP 方法，如 "GET"、"POST"、"PUT"
+            path (str): API 路径，如 "/api/fs/get"
+            **kwargs: 传给 requests.Session.request 的其他参数（data、headers 等）
+
+        Returns:
+            tuple: (requests.Response, dict or None)，响应不是 JSON 时第二项为 None
+        """
+        url = f"{self.openlist_url}{path}"
+        for attempt in range(2):
+            token = self.token
+            resp = self.api_session.request(method, url, timeout=self.timeout, **kwargs)
+            try:
+                data = _parse_json(resp)
+            except ValueError:
+                data = None
+
+            unauthorized = resp.status_code == 401 or (isinstance(data, dict) and data.get("code") == 401)
+            if not unauthorized or attempt or not token or not self.username:
+                break
+            self.log.warning("[WARN] 🔑 令牌已失效，正在重新登录...")
+            self._relogin(token)
+        return resp, data
+
+    def list_dir(self, path, on_file=None):
+        """
+        递归列出目录中的文件。
+
+        以广度优先的任务集合驱动线程池：每个任务只请求某个目录的一页，完成后
+        把新发现的子目录（第一页）和本目录剩余的分页作为新任务提交。任务之间
+        互不等待，所有请求在同一个线程池中重叠进行，因此耗时约为 树深度 × RTT，
+        而不是 目录数 × 页数 × RTT。
+
+        提供 on_file 时，每列出一页就把其中的文件逐个交给 on_file（始终在调用
+        list_dir 的线程中调用），不在内存中累积整个文件列表。
+
+        Args:
+            path (str): 要列出的目录路径
+            on_file (callable): 接收单个文件字典的回调，可选
+
+        Returns:
+            list or int: 未提供 on_file 时返回按路径排序的文件字典列表，每个字典包含
+            名称、路径和大小；提供 on_file 时返回文件总数
+        """
+        files = []
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.list_workers) as executor:
+            pending = {executor.submit(self._list_page, path, 1)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_path, page_files, subdirs, next_pages = future.result()
+                    count += len(page_files)
+                    if on_file is None:
+                        files.extend(page_files)
+                    else:
+                        for file_info in page_files:
+                            on_file(file_info)
+                    for page in next_pages:
+                        pending.add(executor.submit(self._list_page, page_path, page))
+                    for subdir in subdirs:
+                        self.log.debug("[DEBUG] 📁 进入：%s", subdir)
+                        pending.add(executor.submit(self._list_page, subdir, 1))
+
+        self.log.debug("[DEBUG] 📦 '%s' 完成：%s 个文件", path, count)
+        if on_file is not None:
+            return count
+        files.sort(key=lambda f: f["path"])
+        return files
+
+    def _list_page(self, path, page):
+        """
+        列出目录的一页（不递归），并确定还需要请求哪些分页。
+
+        第一页的响应带有 total 时据此算出总页数，剩余各页一次性返回给调用方
+        并发请求；否则只有本页已满时才继续请求下一页。
+
+        Args:
+            path (str): 要列出的目录路径
+            page (int): 页码，从 1 开始
+
+        Returns:
+            tuple: (目录路径, 文件字典列表, 子目录路径列表, 还需请求的页码列表)
+        """
+        if page == 1:
+            self.log.debug("[DEBUG] 📂 正在列出：%s", path)
+        next_pages = []
+
+        data = self._fetch_page(path, page)
+        if not data or not data["content"]:
+            return path, [], [], next_pages
+
+        content = data["content"]
+        total = data.get("total")
+        if total:
+            if page == 1:
+                next_pages = list(range(2, -(-total // self.page_size) + 1))
+        elif len(content) >= self.page_size:
+            next_pages = [page + 1]
+
+        # 每页只计算一次路径前缀，每个条目的完整路径只需一次字符串拼接
+        files, subdirs = split_entries(path.rstrip("/") + "/", content)
+        return path, files, subdirs, next_pages
+
+    def _fetch_page(self, path, page):
+        """
+        请求目录的一页列表。
+
+        Args:
+            path (str): 目录路径
+            page (int): 页码，从 1 开始
+
+        Returns:
+            dict or None: 响应中的 data 对象（包含 content，通常还有 total），失败时返回 None
+        """
+        payload = {
+            "path": path,
+            "password": "",
+            "page": page,
+            "per_page": self.page_size
+        }
+        self.log.debug("[DEBUG] 📥 正在请求 '%s' 的第 %s 页...", path, page)
+        try:
+            resp, data = self._api_post("/api/fs/list", payload)
+        except requests.Timeout:
+            self.log.error("[ERROR] ⏱️ '%s' 的第 %s 页超时", path, page)
+            return None
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            self.log.error("[ERROR] ❌ 第 %s 页异常：%s", page, e)
+            return None
+
+        if resp.status_code != 200:
+            self.log.error("[ERROR] 🚫 '%s' 第 %s 页 HTTP %s", path, page, resp.status_code)
+            return None
+
+        if data is None:
+            self.log.error("[ERROR] 🚫 '%s' 第 %s 页响应中的 JSON 无效：%r", path, page, resp.text)
+            return None
+
+        if data.get("code") != 200:
+            self.log.error("[ERROR] 🚫 API 错误：%s", data)
+            return None
+
+        data = data["data"]
+        data["content"] = data.get("content") or []
+        self.log.debug("[DEBUG] ✅ '%s' 第 %s 页：%s 个项目", path, page, len(data["content"]))
+        return data
+
+    def _fetch_base_path(self):
+        """
+        通过 /api/me 查询当前用户的根目录（base_path）。
+
+        Returns:
+            str or None: 去掉末尾 "/" 的 base_path（根目录为空字符串），查询失败时返回 None
+        """
+        try:
+            # 与其他 API 请求一样，缓存的令牌失效时重新登录后重试
+            _, data = self._api_request("GET", "/api/me")
+        except requests.RequestException as e:
+            self.log.warning("[WARN] ⚠️ 获取用户信息失败，不使用 /d 直链：%s", e)
+            return None
+        if not isinstance(data, dict) or data.get("code") != 200:
+            self.log.warning("[WARN] ⚠️ 获取用户信息失败，不使用 /d 直链：%s", data)
+            return None
+        return (data["data"].get("base_path") or "/").rstrip("/")
+
+    def get_file_size(self, remote_path):
+        """
+        获取远程文件的大小。
+
+        列目录时已知的大小会随下载任务直接传给 download_file，只有缺少大小的文件才会调用这里。
+        
+        Args:
+            remote_path (str): 远程文件的路径
+            
+        Returns:
+            int or None: 文件大小（字节），如果失败则返回 None
+        """
+        payload = {"path": remote_path, "password": ""}
+        try:
+            resp, data = self._api_post("/api/fs/get", payload)
+            if resp.status_code == 200:
+                if data is None:
+                    self.log.warning("[WARN] 获取 %s 大小时收到非 JSON 响应：%r", remote_path, resp.text)
+                    return None
+                if data.get("code") == 200:
+                    return data["data"].get("size", 0)
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            self.log.warning("[WARN] 获取 %s 大小失败：%s", remote_path, e)
+        return None
+
+    def download_file(self, remote_path, local_path, expected_size=None, direct_url=None, checked=False):
+        """
+        从 OpenList 下载文件到本地存储。
+        
+        首先尝试使用原始 URL 下载，如果失败则回退到流方法。
+        如果启用了 skip_existing 且文件大小匹配，则跳过现有文件。
+        提供 direct_url 时直接下载，省去 /api/fs/get 的一次往返；直链不可用时
+        再走原来的流程。
+        
+        Args:
+            remote_path (str): 远程文件的路径
+            local_path (str): 保存文件的本地路径
+            expected_size (int): 列目录时得到的远程文件大小。提供时跳过检查不再请求服务器。
+            direct_url (str): 由列目录结果构造的直链（见 _direct_url）
+            checked (bool): 调用方已用本地文件索引确认需要下载（见 _download_tasks），
+                为 True 时不再单独 stat
+        """
+        # 跳过检查放在任何系统调用和网络请求之前：已知大小时只需一次 stat，
+        # 只有调用方没有提供大小时才向服务器查询
+        if self.skip_existing and not checked:
+            local_size = _local_size(local_path)
+            if local_size > 0:
+                remote_size = expected_size
+                if remote_size is None:
+                    remote_size = self.get_file_size(remote_path)
+                if remote_size is not None and local_size == remote_size:
+                    self.log.info("[SKIP] ✅ 已存在：%s", local_path)
+                    return
+
+        self._ensure_local_dir(os.path.dirname(local_path))
+
+        if direct_url:
+            try:
+                self.log.info("[DOWNLOAD] 🔗 使用直链：%s", remote_path)
+                status = self._download_raw(direct_url, local_path, expected_size or 0)
+                if status == 200:
+                    self.log.info("[OK] ✅ 已保存：%s", local_path)
+                    return
+                self.log.warning("[WARN] 直链失败（%s），改用 /api/fs/get：%s", status, remote_path)
+            except Exception as e:
+                self.log.warning("[WARN] 直链失败（%s），改用 /api/fs/get：%s", e, remote_path)
+
+        # 首先尝试 raw_url
+        payload = {"path": remote_path, "password": ""}
+        try:
+            resp, data = self._api_post("/api/fs/get", payload)
+            if resp.status_code != 200 or not data or data.get("code") != 200:
+                # 如果响应不可用，则回退到流
+                self._download_via_stream(remote_path, local_path)
+                return
+
+            raw_url = data["data"].get("raw_url")
+            if not raw_url:
+                self._download_via_stream(remote_path, local_path)
+                return
+
+            self.log.info("[DOWNLOAD] 🔗 使用 raw_url：%s", remote_path)
+            size = expected_size if expected_size is not None else data["data"].get("size", 0)
+            status = self._download_raw(raw_url, local_path, size)
+            if status != 200:
+                self.log.error("[ERROR] ❌ raw_url 失败（%s）", status)
+                return
+            self.log.info("[OK] ✅ 已保存：%s", local_path)
+
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            self.log.error("[ERROR] ❌ 下载失败：%s", e)
+
+    def _ensure_local_dir(self, directory):
+        """
+        确保本地目录存在，每个目录在本次运行中只调用一次 os.makedirs。
+
+        makedirs 会对路径的每一级 stat，同一目录下成千上万个文件重复调用时
+        全是无用的系统调用；已创建的目录记在集合中，之后只需一次集合查找。
+
+        Args:
+            directory (str): 本地目录路径
+        """
+        if directory in self._local_dirs:
+            return
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local_dirs.add(directory)
+
+    def _download_raw(self, raw_url, local_path, size):
+        """
+        从直链下载文件，大文件在服务器支持时分段并行下载。
+
+        run() 启用了按主机并发限制时，下载期间占用该主机的一个名额，
+        并把响应延迟反馈给限制器；分段下载的其余分段各占一个额外名额，
+        只使用当前空闲的名额，没有空闲名额时退回单连接下载。
+
+        Args:
+            raw_url (str): 文件的直链
+            local_path (str): 保存文件的本地路径
+            size (int): 预期的文件大小（字节），未知时为 0
+
+        Returns:
+            int: HTTP 状态码，200 表示已完整保存
+        """
+        limiter = self._host_limiter
+        host = urlsplit(raw_url).netloc
+        with limiter.slot(host) if limiter else _null_context():
+            parts = self.range_parts
+            if limiter and parts >= 2 and size and size >= RANGED_DOWNLOAD_THRESHOLD:
+                with limiter.extra_slots(host, parts - 1) as extra:
+                    if extra and self._download_file_ranged(raw_url, local_path, size, extra + 1):
+                        return 200
+            elif self._download_file_ranged(raw_url, local_path, size):
+                return 200
+
+            with self.dl_session.get(raw_url, stream=True, timeout=self.timeout) as r:
+                if limiter:
+                    # 403/404 等错误响应通常立即返回，计入延迟会把基线拉得过低
+                    if r.status_code == 200:
+                        limiter.record(host, r.elapsed.total_seconds())
+                    elif r.status_code in (429, 503):
+                        limiter.record(host, None, congested=True)
+                if r.status_code != 200:
+                    return r.status_code
+                self._save_response(r, local_path)
+            return 200
+
+    def _direct_url(self, file_info):
+        """
+        根据列目录得到的文件信息构造直链，无需再调用 /api/fs/get。
+
+        列表项带有 raw_url 时直接使用；否则在列表项带有 sign 字段时构造
+        OpenList 的 /d 下载链接（启用签名时附带 sign 参数）。列表中的路径相对于
+        用户的 base_path，而 /d 链接从服务器根目录解析，因此需要加上 base_path；
+        base_path 未知时不构造 /d 链接，由调用方改用 /api/fs/get。
+
+        Args:
+            file_info (dict): list_dir 返回的文件字典
+
+        Returns:
+            str or None: 直链，无法构造时返回 None
+        """
+        raw_url = file_info.get("raw_url")
+        if raw_url:
+            return raw_url
+        sign = file_info.get("sign")
+        if sign is None or self._base_path is None:
+            return None
+        url = f"{self.openlist_url}/d{quote(self._base_path + file_info['path'])}"
+        return f"{url}?sign={sign}" if sign else url
+
+    def _download_file_ranged(self, raw_url, local_path, size, parts=None):
+        """
+        使用多个 HTTP Range 请求并行下载单个大文件。
+
+        不单独发送 HEAD 探测：第一段的请求本身就是探测，返回 206 且 Content-Range
+        中的总长度与预期一致时，才把文件预分配到完整大小并并发请求其余分段；
+        各分段由独立线程请求并用 os.pwrite 写入对应偏移，使单个大文件也能用满
+        多条连接的带宽。内容先写入 .part 临时文件，全部完成后才改名，
+        因此中断的下载不会被当作已存在的完整文件跳过。
+
+        Args:
+            raw_url (str): 文件的直链
+            local_path (str): 保存文件的本地路径
+            size (int): 文件大小（字节）
+            parts (int): 分段数。默认为配置中的 range_parts。
+
+        Returns:
+            bool: 分段下载成功时返回 True；不适用或失败时返回 False，由调用方改用单连接下载
+        """
+        parts = parts or self.range_parts
+        if parts < 2 or not size or size < RANGED_DOWNLOAD_THRESHOLD or not hasattr(os, "pwrite"):
+            return False
 
-        if not self.username or not self.password:
-            raise ValueError("config.json 中缺少用户名/密码")
+        step = -(-size // parts)
+        ranges = [(start, min(start + step, size)) for start in range(0, size, step)]
 
-        self.print(f"[INFO] 正在登录到 {self.openlist_url}...")
-        url = f"{self.openlist_url}/api/auth/login"
-        payload = {"username": self.username, "password": self.password}
+        start, end = ranges[0]
         try:
-            resp = self.session.post(url, json=payload, timeout=self.timeout)
-            try:
-                data = resp.json()
-            except ValueError:
-                # 非 JSON 响应（空正文或 HTML 错误），提供有用的信息
-                raise Exception(f"登录失败：非 JSON 响应（状态 {resp.status_code}）：{resp.text!r}")
+            first = self.dl_session.get(
+                raw_url, headers={"Range": f"bytes={start}-{end - 1}"}, stream=True, timeout=self.timeout
+            )
+        except requests.RequestException:
+            return False
+        # 不支持 Range 的服务器会返回 200 和完整正文，此时放弃分段，由调用方单连接下载
+        if first.status_code != 206 or first.headers.get("Content-Range", "").rpartition("/")[2] != str(size):
+            first.close()
+            return False
 
-            if data.get("code") == 200:
-                self.token = data["data"]["token"]
-                self.session.headers.update({"Authorization": self.token})
-                self.print("[INFO] 登录成功。")
-            else:
-                raise Exception(f"登录失败：{data}")
+        self.log.info("[DOWNLOAD] 🧩 分 %s 段下载：%s", len(ranges), local_path)
+        part_path = local_path + ".part"
+        abort = threading.Event()
+        try:
+            fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError:
+            first.close()
+            raise
+        try:
+            if not _preallocate(fd, size):
+                os.ftruncate(fd, size)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(self._download_range, raw_url, fd, start, end, abort, first)]
+                futures += [
+                    executor.submit(self._download_range, raw_url, fd, start, end, abort)
+                    for start, end in ranges[1:]
+                ]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception:
+                        abort.set()
+                        raise
+            if size >= DIRECT_IO_THRESHOLD:
+                _drop_page_cache(fd)
         except Exception as e:
-            raise Exception(f"[ERROR] 登录请求失败：{e}")
+            first.close()
+            os.close(fd)
+            os.remove(part_path)
+            self.log.warning("[WARN] ⚠️ 分段下载失败，改用单连接下载：%s", e)
+            return False
 
-    def print(self, msg):
+        os.close(fd)
+        os.replace(part_path, local_path)
+        return True
+
+    def _download_range(self, raw_url, fd, start, end, abort, resp=None):
         """
-        打印消息到标准输出，处理编码错误。
-        
+        下载文件的一个分段 [start, end) 并写入文件描述符的对应偏移。
+
         Args:
-            msg (str): 要打印的消息
+            raw_url (str): 文件的直链
+            fd (int): 已打开的输出文件描述符
+            start (int): 分段起始偏移（包含）
+            end (int): 分段结束偏移（不包含）
+            abort (threading.Event): 其他分段失败时被设置，用于提前结束
+            resp (requests.Response): 已经发出的该分段请求的响应（探测用的第一段），可选
         """
-        try:
-            print(msg)
-        except UnicodeEncodeError:
-            print(msg.encode("utf-8", errors="replace").decode("utf-8"))
+        if resp is None:
+            headers = {"Range": f"bytes={start}-{end - 1}"}
+            resp = self.dl_session.get(raw_url, headers=headers, stream=True, timeout=self.timeout)
+        with resp as r:
+            if r.status_code != 206:
+                raise ValueError(f"Range 请求返回 HTTP {r.status_code}")
+            offset = start
+            for chunk in r.iter_content(chunk_size=65536):
+                if abort.is_set():
+                    return
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        if offset != end:
+            raise ValueError(f"分段 {start}-{end - 1} 长度不完整")
 
-    def list_dir(self, path):
+    def _download_via_stream(self, remote_path, local_path):
         """
-        递归列出目录中的文件。
+        使用流 API 下载文件。
+        
+        当直接下载失败时使用的私有回退方法。
         
         Args:
-            path (str): 要列出的目录路径
-            
-        Returns:
-            list: 包含文件名字典的列表，每个字典包含名称、路径和大小
+            remote_path (str): 远程文件的路径
+            local_path (str): 保存文件的本地路径
         """
-        files = []
-        page = 1
-        total_in_dir = 0
-        self.print(f"[DEBUG] 📂 正在列出：{path}")
-
-        while True:
-            url = f"{self.openlist_url}/api/fs/list"
-            payload = {
-                "path": path,
-                "password": "",
-                "page": page,
-                "per_page": self.page_size
-            }
-            self.print(f"[DEBUG] 📥 正在请求 '{path}' 的第 {page} 页...")
-            try:
-                resp = self.session.post(url, json=payload, timeout=self.timeout)
-            except requests.Timeout:
-                self.print(f"[ERROR] ⏱️ '{path}' 的第 {page} 页超时")
-                break
-            except Exception as e:
-                self.print(f"[ERROR] ❌ 第 {page} 页异常：{e}")
-                break
-
-            if resp.status_code != 200:
-                self.print(f"[ERROR] 🚫 '{path}' 第 {page} 页 HTTP {resp.status_code}")
-                break
+        url = f"{self.openlist_url}/api/fs/stream"
+        payload = {"path": remote_path, "password": ""}
+        try:
+            # 以 with 关闭响应：出错时未读取的流式响应也会及时归还连接池，而不是等到被垃圾回收
+            with self.api_session.post(url, data=_json_dumps(payload), stream=True, timeout=self.timeout) as resp:
+                if resp.status_code == 200:
+                    self._save_response(resp, local_path)
+                    self.log.info("[OK] ✅ 通过流已保存：%s", local_path)
+                else:
+                    self.log.error("[ERROR] ❌ 流失败（%s）", resp.status_code)
+        except Exception as e:
+            self.log.error("[ERROR] ❌ 流异常：%s", e)
 
-            try:
-                data = resp.json()
-            except ValueError:
-                self.print(f"[ERROR] 🚫 '{path}' 第 {page} 页响应中的 JSON 无效：{resp.text!r}")
-                break
+    def _save_response(self, resp, local_path):
+        """
+        将流式响应的正文写入本地文件。
 
-            if data.get("code") != 200:
-                self.print(f"[ERROR] 🚫 API 错误：{data}")
-                break
+        大文件交给后台线程写盘，使网络接收与磁盘写入重叠；
+        小文件直接写入，省去创建线程的开销。超过 DIRECT_IO_THRESHOLD 的文件
+        写完后丢弃其页缓存。
 
-            content = data["data"]["content"]
-            if not content:
-                break
+        内容先写入 .part 临时文件，完整写完后才改名为目标文件，因此预分配了
+        空间却中途失败的文件不会被 skip_existing 当作已完成的文件跳过。
 
-            current_count = len(content)
-            total_in_dir += current_count
-            self.print(f"[DEBUG] ✅ 第 {page} 页：{current_count} 个项目（目录总计：{total_in_dir}）")
+        Args:
+            resp (requests.Response): 以 stream=True 发起的响应
+            local_path (str): 保存文件的本地路径
+        """
+        size = int(resp.headers.get("Content-Length") or 0)
+        if "Content-Encoding" in resp.headers:
+            # 压缩传输时 Content-Length 是压缩后的长度，不能用于预分配
+            size = 0
 
-            for item in content:
-                full_path = f"{path.rstrip('/')}/{item['name']}"
-                if item["is_dir"]:
-                    self.print(f"[DEBUG] 📁 进入：{full_path}")
-                    files.extend(self.list_dir(full_path))
+        part_path = local_path + ".part"
+        try:
+            with self._open_output(part_path, size) as f:
+                if not isinstance(f, _DirectFile) and self._splice_response(resp, f, size):
+                    pass
+                elif size < WRITE_BEHIND_THRESHOLD:
+                    _copy_response(resp, f, self._buffer_pool)
                 else:
-                    files.append({
-                        "name": item["name"],
-                        "path": full_path,
-                        "size": item.get("size", 0)
-                    })
+                    writer = _WriteBehindWriter(f)
+                    try:
+                        _copy_response(resp, writer, self._buffer_pool)
+                    finally:
+                        writer.close()
+                # 实际长度与预分配的长度不一致时以实际写入为准
+                f.truncate()
+                if size >= DIRECT_IO_THRESHOLD and not isinstance(f, _DirectFile):
+                    f.flush()
+                    _drop_page_cache(f.fileno())
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        os.replace(part_path, local_path)
 
-            if current_count < self.page_size:
-                break
-            page += 1
+    def _splice_response(self, resp, f, size):
+        """
+        尝试用 os.splice 把响应正文从套接字直接搬运到文件（零拷贝）。
 
-        self.print(f"[DEBUG] 📦 '{path}' 完成：{len(files)} 个文件")
-        return files
+        数据经由管道在内核中移动，不再复制到 Python 的 bytes 对象里。
+        仅适用于 Linux 上明文 HTTP、未压缩、带 Content-Length 的大响应；
+        TLS 连接的数据需要在用户态解密，无法 splice。由于绕过了 urllib3，
+        完成后连接会被关闭而不是放回连接池。
 
-    def get_file_size(self, remote_path):
-        """
-        获取远程文件的大小。
-        
         Args:
-            remote_path (str): 远程文件的路径
-            
+            resp (requests.Response): 以 stream=True 发起、尚未读取正文的响应
+            f: 以缓冲模式打开的输出文件
+            size (int): Content-Length
+
         Returns:
-            int or None: 文件大小（字节），如果失败则返回 None
+            bool: 已通过 splice 写完正文时返回 True；条件不满足时返回 False 且未读取任何正文
         """
-        url = f"{self.openlist_url}/api/fs/get"
-        payload = {"path": remote_path, "password": ""}
+        if (not hasattr(os, "splice") or size < ZERO_COPY_THRESHOLD
+                or urlsplit(resp.url).scheme != "http"
+                or "Transfer-Encoding" in resp.headers):
+            return False
         try:
-            resp = self.session.post(url, json=payload, timeout=self.timeout)
-            if resp.status_code == 200:
+            # urllib3 响应 -> http.client 响应 -> 套接字的缓冲读取器 -> SocketIO -> socket
+            buffered = resp.raw._fp.fp
+            sock = buffered.raw._sock
+        except AttributeError:
+            return False
+        if isinstance(sock, ssl.SSLSocket):
+            return False
+
+        # 读取响应头时缓冲读取器可能已经读入了部分正文，先原样写出
+        head = buffered.peek(0)[:size]
+        head = buffered.read(len(head))
+        f.write(head)
+        f.flush()
+
+        sock_fd = sock.fileno()
+        out_fd = f.fileno()
+        remaining = size - len(head)
+        pipe_r, pipe_w = os.pipe()
+        try:
+            pipe_size = 65536
+            if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
                 try:
-                    data = resp.json()
-                except ValueError:
-                    self.print(f"[WARN] 获取 {remote_path} 大小时收到非 JSON 响应：{resp.text!r}")
-                    return None
-                if data.get("code") == 200:
-                    return data["data"].get("size", 0)
-        except Exception as e:
-            self.print(f"[WARN] 获取 {remote_path} 大小失败：{e}")
-        return None
+                    pipe_size = fcntl.fcntl(pipe_w, fcntl.F_SETPIPE_SZ, 1024 * 1024)
+                except OSError:
+                    pass
+            while remaining:
+                try:
+                    n = os.splice(sock_fd, pipe_w, min(remaining, pipe_size))
+                except BlockingIOError:
+                    # 设置了超时的套接字处于非阻塞模式
+                    if not select.select([sock_fd], [], [], self.timeout)[0]:
+                        raise TimeoutError(f"读取超时（{self.timeout} 秒）")
+                    continue
+                if n == 0:
+                    raise ConnectionError(f"连接提前关闭，还有 {remaining} 字节未接收")
+                remaining -= n
+                while n:
+                    n -= os.splice(pipe_r, out_fd, n)
+        finally:
+            os.close(pipe_r)
+            os.close(pipe_w)
+            resp.close()
+        return True
 
-    def download_file(self, remote_path, local_path):
+    def _open_output(self, local_path, size):
         """
-        从 OpenList 下载文件到本地存储。
-        
-        首先尝试使用原始 URL 下载，如果失败则回退到流方法。
-        如果启用了 skip_existing 且文件大小匹配，则跳过现有文件。
-        
+        打开用于写入下载内容的本地文件。
+
+        启用 direct_io 时，超过 DIRECT_IO_THRESHOLD 的文件使用 O_DIRECT 打开，
+        完全不经过页缓存；不支持 O_DIRECT 的平台或文件系统回退到普通的缓冲写入。
+        O_DIRECT 的每次写入都同步落盘，在部分文件系统上反而更慢，因此默认关闭，
+        默认情况下大文件在写完后再丢弃页缓存（见 _drop_page_cache）。
+        已知大小时预先分配磁盘空间。
+
+        Args:
+            local_path (str): 保存文件的本地路径
+            size (int): 预期的文件大小（字节），未知时为 0
+
+        Returns:
+            可写的二进制文件对象（支持 with 语句）
+        """
+        if self.direct_io and size >= DIRECT_IO_THRESHOLD and hasattr(os, "O_DIRECT"):
+            try:
+                return _DirectFile(local_path, size)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+        # 与读取块大小一致的写缓冲：短读（分块传输、压缩解码）得到的小块在缓冲中合并，
+        # 整块写入直接穿过缓冲，每次 write 系统调用至少写出 1MB
+        f = open(local_path, "wb", buffering=COPY_BUFFER_SIZE)
+        _preallocate(f.fileno(), size)
+        return f
+
+    async def _download_file_async(self, session, remote_path, local_path, expected_size=None, direct_url=None,
+                                   checked=False):
+        """
+        download_file 的异步版本，基于 aiohttp 和 aiofiles。
+
+        与同步版本逻辑一致，但未提供 expected_size 时，跳过检查与获取 raw_url
+        共用同一次 /api/fs/get 请求。
+
         Args:
+            session (aiohttp.ClientSession): 共享的异步会话
             remote_path (str): 远程文件的路径
             local_path (str): 保存文件的本地路径
+            expected_size (int): 列目录时得到的远程文件大小
+            direct_url (str): 由列目录结果构造的直链（见 _direct_url）
+            checked (bool): 调用方已用本地文件索引确认需要下载，为 True 时不再单独 stat
         """
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        if self.skip_existing and expected_size is not None and not checked:
+            local_size = _local_size(local_path)
+            if local_size > 0 and local_size == expected_size:
+                self.log.info("[SKIP] ✅ 已存在：%s", local_path)
+                return
 
-        if self.skip_existing and os.path.exists(local_path):
-            local_size = os.path.getsize(local_path)
-            if local_size > 0:
-                remote_size = self.get_file_size(remote_path)
-                if remote_size is not None and local_size == remote_size:
-                    self.print(f"[SKIP] ✅ 已存在：{local_path}")
+        self._ensure_local_dir(os.path.dirname(local_path))
+
+        if direct_url:
+            try:
+                self.log.info("[DOWNLOAD] 🔗 使用直链：%s", remote_path)
+                status = await self._download_raw_async(session, direct_url, local_path)
+                if status == 200:
+                    self.log.info("[OK] ✅ 已保存：%s", local_path)
                     return
+                self.log.warning("[WARN] 直链失败（%s），改用 /api/fs/get：%s", status, remote_path)
+            except Exception as e:
+                self.log.warning("[WARN] 直链失败（%s），改用 /api/fs/get：%s", e, remote_path)
 
-        # 首先尝试 raw_url
         url = f"{self.openlist_url}/api/fs/get"
         payload = {"path": remote_path, "password": ""}
         try:
-            resp = self.session.post(url, json=payload, timeout=self.timeout)
-            # 安全地解析 JSON
-            data = None
-            try:
-                data = resp.json()
-            except ValueError:
-                data = None
+            for attempt in range(2):
+                token = self.token
+                auth = {"Authorization": token}
+                async with session.post(url, json=payload, headers=auth) as resp:
+                    status = resp.status
+                    try:
+                        data = await resp.json(loads=_json_loads, content_type=None)
+                    except ValueError:
+                        data = None
 
-            if resp.status_code != 200 or not data or data.get("code") != 200:
-                # 如果响应不可用，则回退到流
-                self._download_via_stream(remote_path, local_path)
+                unauthorized = status == 401 or (isinstance(data, dict) and data.get("code") == 401)
+                if not unauthorized or attempt or not token or not self.username:
+                    break
+                # 与 _api_post 相同：令牌失效时重新登录（在线程池中执行同步登录）并重试一次
+                self.log.warning("[WARN] 🔑 令牌已失效，正在重新登录...")
+                await asyncio.get_event_loop().run_in_executor(None, self._relogin, token)
+
+            if status != 200 or not data or data.get("code") != 200:
+                await self._download_via_stream_async(session, remote_path, local_path)
                 return
 
+            if self.skip_existing and expected_size is None:
+                local_size = _local_size(local_path)
+                if local_size > 0 and local_size == data["data"].get("size", 0):
+                    self.log.info("[SKIP] ✅ 已存在：%s", local_path)
+                    return
+
             raw_url = data["data"].get("raw_url")
             if not raw_url:
-                self._download_via_stream(remote_path, local_path)
+                await self._download_via_stream_async(session, remote_path, local_path)
                 return
 
-            self.print(f"[DOWNLOAD] 🔗 使用 raw_url：{remote_path}")
-            with requests.get(raw_url, stream=True, timeout=self.timeout) as r:
-                if r.status_code != 200:
-                    self.print(f"[ERROR] ❌ raw_url 失败（{r.status_code}）")
-                    return
-                with open(local_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=65536):
-                        f.write(chunk)
-            self.print(f"[OK] ✅ 已保存：{local_path}")
+            self.log.info("[DOWNLOAD] 🔗 使用 raw_url：%s", remote_path)
+            status = await self._download_raw_async(session, raw_url, local_path)
+            if status != 200:
+                self.log.error("[ERROR] ❌ raw_url 失败（%s）", status)
+                return
+            self.log.info("[OK] ✅ 已保存：%s", local_path)
 
+        except AuthenticationError:
+            raise
         except Exception as e:
-            self.print(f"[ERROR] ❌ 下载失败：{e}")
+            self.log.error("[ERROR] ❌ 下载失败：%s", e)
 
-    def _download_via_stream(self, remote_path, local_path):
+    async def _download_raw_async(self, session, raw_url, local_path):
         """
-        使用流 API 下载文件。
-        
-        当直接下载失败时使用的私有回退方法。
-        
+        _download_raw 的异步版本（不分段）。
+
+        Args:
+            session (aiohttp.ClientSession): 共享的异步会话
+            raw_url (str): 文件的直链
+            local_path (str): 保存文件的本地路径
+
+        Returns:
+            int: HTTP 状态码，200 表示已完整保存
+        """
+        async with session.get(raw_url) as r:
+            if r.status != 200:
+                return r.status
+            await self._save_response_async(r, local_path)
+        return 200
+
+    async def _download_via_stream_async(self, session, remote_path, local_path):
+        """
+        _download_via_stream 的异步版本。
+
         Args:
+            session (aiohttp.ClientSession): 共享的异步会话
             remote_path (str): 远程文件的路径
             local_path (str): 保存文件的本地路径
         """
         url = f"{self.openlist_url}/api/fs/stream"
         payload = {"path": remote_path, "password": ""}
         try:
-            resp = self.session.post(url, json=payload, stream=True, timeout=self.timeout)
-            if resp.status_code == 200:
-                with open(local_path, "wb") as f:
-                    for chunk in resp.iter_content(chunk_size=65536):
-                        f.write(chunk)
-                self.print(f"[OK] ✅ 通过流已保存：{local_path}")
-            else:
-                self.print(f"[ERROR] ❌ 流失败（{resp.status_code}）")
+            async with session.post(url, json=payload, headers={"Authorization": self.token}) as resp:
+                if resp.status == 200:
+                    await self._save_response_async(resp, local_path)
+                    self.log.info("[OK] ✅ 通过流已保存：%s", local_path)
+                else:
+                    self.log.error("[ERROR] ❌ 流失败（%s）", resp.status)
         except Exception as e:
-            self.print(f"[ERROR] ❌ 流异常：{e}")
+            self.log.error("[ERROR] ❌ 流异常：%s", e)
 
-    def save_filelist(self, filelist, path="filelist.json"):
+    async def _save_response_async(self, resp, local_path):
         """
-        将文件列表保存到 JSON 文件。
-        
+        _save_response 的异步版本。
+
+        与同步版本一样先写入 .part 临时文件，完整写完后才改名为目标文件，
+        中途失败或被取消的下载不会被 skip_existing 当作已完成的文件跳过。
+        按 COPY_BUFFER_SIZE 读取，减少 aiofiles 每次写入切换到线程池的次数。
+        大文件写完后同样丢弃其页缓存。
+
+        Args:
+            resp (aiohttp.ClientResponse): 尚未读取正文的响应
+            local_path (str): 保存文件的本地路径
+        """
+        part_path = local_path + ".part"
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for chunk in resp.content.iter_chunked(COPY_BUFFER_SIZE):
+                    await f.write(chunk)
+                if (resp.content_length or 0) >= DIRECT_IO_THRESHOLD:
+                    await f.flush()
+                    await asyncio.get_event_loop().run_in_executor(None, _drop_page_cache, f.fileno())
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        os.replace(part_path, local_path)
+
+    async def _download_all_async(self, tasks, workers, progress):
+        """
+        在单个事件循环中并发下载所有文件。
+
+        所有请求共享一个 aiohttp 连接池。任务按需从 tasks 中取出，同时进行的
+        下载不超过 workers 个，不会为整个文件列表预先创建协程。
+
+        Args:
+            tasks (iterable): (remote_path, local_path, expected_size, direct_url, checked) 元组的可迭代对象
+            workers (int): 最大并发下载数
+            progress (_Progress): 进度计数器
+        """
+        connector = aiohttp.TCPConnector(limit=workers, limit_per_host=workers, keepalive_timeout=75)
+        # 与 requests 的 timeout 含义一致：限制连接和每次读取，而不是整个下载
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+
+        def report(done):
+            for task in done:
+                task.result()
+            progress.advance(len(done))
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": "openlist-downloader/1.0"},
+            json_serialize=lambda obj: _json_dumps(obj).decode("utf-8")
+        ) as session:
+            pending = set()
+            for task in tasks:
+                if len(pending) >= workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    report(done)
+                pending.add(asyncio.ensure_future(self._download_file_async(session, *task)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                report(done)
+
+    @contextlib.contextmanager
+    def _filelist_writer(self, path=FILELIST_PATH):
+        """
+        打开 JSON Lines 文件列表用于逐条写入，产出写入单个文件字典的函数。
+
+        先写入临时文件，正常结束时才原子替换为 path，列目录中途失败不会
+        覆盖上一次完整的文件列表。
+
+        Args:
+            path (str): 文件列表的路径。默认为 FILELIST_PATH。
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        f = open(tmp_path, "wb")
+
+        def write(file_info):
+            f.write(_json_dumps(file_info))
+            f.write(b"\n")
+
+        try:
+            yield write
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+        f.close()
+        os.replace(tmp_path, path)
+        self.log.info("[INFO] 📝 文件列表已保存到 %s", path)
+
+    def save_filelist(self, filelist, path=FILELIST_PATH):
+        """
+        将文件列表保存为 JSON Lines 文件，每行一个文件字典。
+
         Args:
-            filelist (list): 要保存的文件字典列表
-            path (str): 保存文件列表的路径。默认为 "filelist.json"。
+            filelist (iterable): 文件字典的可迭代对象（列表或生成器）
+            path (str): 保存文件列表的路径。默认为 FILELIST_PATH。
+
+        Returns:
+            int: 写入的文件数
         """
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(filelist, f, ensure_ascii=False, indent=2)
-        self.print(f"[INFO] 📝 文件列表已保存到 {path}")
+        count = 0
+        with self._filelist_writer(path) as write:
+            for file_info in filelist:
+                write(file_info)
+                count += 1
+        return count
 
-    def load_filelist(self, path="filelist.json"):
+    def load_filelist(self, path=FILELIST_PATH):
         """
-        从 JSON 文件加载文件列表。
+        从 JSON Lines 文件逐条加载文件列表。
+
+        返回的迭代器每次只解析一行，整个文件列表不会同时驻留内存。
+        找不到 FILELIST_PATH 但存在旧版本的 filelist.json 时，先将其转换为 JSON Lines。
         
         Args:
-            path (str): 加载文件列表的路径。默认为 "filelist.json"。
+            path (str): 加载文件列表的路径。默认为 FILELIST_PATH。
             
         Returns:
-            list or None: 文件字典列表，如果文件不存在则返回 None
+            iterator or None: 逐个产生文件字典的迭代器，如果文件不存在则返回 None
         """
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
+        if not os.path.exists(path):
+            if path != FILELIST_PATH or not os.path.exists(LEGACY_FILELIST_PATH):
+                return None
+            self.log.info("[INFO] 🔄 正在将 %s 转换为 %s", LEGACY_FILELIST_PATH, path)
+            with open(LEGACY_FILELIST_PATH, "rb") as f:
+                self.save_filelist(_json_loads(f.read()), path)
+        return self._iter_filelist(path)
+
+    def _iter_filelist(self, path):
+        """逐行解析 JSON Lines 文件列表的生成器。"""
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield _json_loads(line)
 
     def upload_file(self, local_path, remote_path):
         """
@@ -329,13 +1798,13 @@ class OpenListDownloader:
             remote_path (str): 远程目标路径
         """
         if not os.path.exists(local_path):
-            self.print(f"[ERROR] 本地文件不存在: {local_path}")
+            self.log.error("[ERROR] 本地文件不存在: %s", local_path)
             return False
 
         # 创建目录（如果尚不存在）
         dir_path = '/'.join(remote_path.split('/')[:-1])
         if dir_path:
-            self.create_directory(dir_path)
+            self.ensure_directory(dir_path)
 
         # 使用 PUT 方法上传文件，模拟浏览器请求
         try:
@@ -346,46 +1815,114 @@ class OpenListDownloader:
             # 对路径进行URL编码，先UTF-8编码再URL编码
             encoded_path = requests.utils.quote(remote_path.encode('utf-8'))
             
+            # 认证头由会话提供；文件正文不是 JSON，去掉会话默认的 Content-Type
             headers = {
-                "Authorization": self.token,
+                "Content-Type": None,
                 "File-Path": encoded_path,
                 "Last-Modified": last_modified,
                 "Overwrite": "false",
             }
             
-            #self.print(f"[DEBUG] 正在使用 PUT 方法上传文件: {local_path} -> {remote_path}")
-            upload_url = f"{self.openlist_url}/api/fs/put"
-            
-            with open(local_path, 'rb') as f:
-                upload_resp = requests.put(upload_url, data=f, headers=headers, timeout=self.timeout)
-                
-                #self.print(f"[DEBUG] 上传响应状态: {upload_resp.status_code}")
-                #self.print(f"[DEBUG] 上传响应头部: {dict(upload_resp.headers)}")
-                
-                # 尝试解析 JSON 响应
-                try:
-                    response_data = upload_resp.json()
-                    self.print(f"[DEBUG] 上传响应: {response_data}")
-                    if upload_resp.status_code in [200, 201, 204]:
-                        if response_data.get("code") == 200:
-                            self.print(f"[OK] ✅ 已上传: {local_path} -> {remote_path}")
-                            return True
-                        else:
-                            # 显示具体的文件名和错误信息
-                            self.print(f"[ERROR] ❌ 上传失败 {os.path.basename(remote_path)}: {response_data}")
-                            return False
-                    else:
-                        self.print(f"[ERROR] ❌ 上传失败，HTTP状态码: {upload_resp.status_code}")
-                        return False
-                except ValueError:
-                    response_text = upload_resp.text[:1000] if upload_resp.text else "Empty response"
-                    self.print(f"[ERROR] ❌ 上传失败，非 JSON 响应 ({upload_resp.status_code}): {response_text}")
+            #self.log.debug("[DEBUG] 正在使用 PUT 方法上传文件: %s -> %s", local_path, remote_path)
+            upload_resp, response_data = self._put_file("/api/fs/put", local_path, headers)
+
+            #self.log.debug("[DEBUG] 上传响应状态: %s", upload_resp.status_code)
+            #self.log.debug("[DEBUG] 上传响应头部: %s", dict(upload_resp.headers))
+
+            # 检查 JSON 响应
+            if response_data is None:
+                response_text = upload_resp.text[:1000] if upload_resp.text else "Empty response"
+                self.log.error("[ERROR] ❌ 上传失败，非 JSON 响应 (%s): %s", upload_resp.status_code, response_text)
+                return False
+            self.log.debug("[DEBUG] 上传响应: %s", response_data)
+            if upload_resp.status_code in [200, 201, 204]:
+                if response_data.get("code") == 200:
+                    self.log.info("[OK] ✅ 已上传: %s -> %s", local_path, remote_path)
+                    return True
+                else:
+                    # 显示具体的文件名和错误信息
+                    self.log.error("[ERROR] ❌ 上传失败 %s: %s", os.path.basename(remote_path), response_data)
                     return False
-                    
+            else:
+                self.log.error("[ERROR] ❌ 上传失败，HTTP状态码: %s", upload_resp.status_code)
+                return False
+
+        except AuthenticationError:
+            raise
         except Exception as e:
-            self.print(f"[ERROR] ❌ 上传异常 {os.path.basename(remote_path)}: {e}")
+            self.log.error("[ERROR] ❌ 上传异常 %s: %s", os.path.basename(remote_path), e)
             return False
 
+    def _put_file(self, path, local_path, headers):
+        """
+        以 PUT 请求上传文件内容，令牌失效时与其他 API 请求一样重新登录后重试。
+
+        文件通过 mmap 映射后以 memoryview 作为请求体：urllib3 把它作为单个缓冲区
+        交给 sendall，直接从页缓存发送，不再按 8-16KB 逐块 read() 再复制；
+        同时设置 MADV_SEQUENTIAL 以获得更积极的预读。memoryview 可以完整重发，
+        因此重试时无需回绕文件位置。
+
+        Args:
+            path (str): 上传接口的 API 路径
+            local_path (str): 本地文件路径
+            headers (dict): 附加的请求头
+
+        Returns:
+            tuple: (requests.Response, dict or None)，响应不是 JSON 时第二项为 None
+        """
+        size = os.path.getsize(local_path)
+        headers = dict(headers, **{"Content-Length": str(size)})
+        if size == 0:
+            # 空文件无法 mmap
+            return self._api_request("PUT", path, data=b"", headers=headers)
+
+        with open(local_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as body:
+                return self._api_request("PUT", path, data=body, headers=headers)
+
+    def ensure_directory(self, path):
+        """
+        确保远程目录存在，每个目录在本次运行中最多请求一次 mkdir。
+
+        mkdir 会同时创建所有上级目录，因此成功后把路径及其所有上级都记为已存在，
+        同一目录下的其他文件以及子目录都不会再发起请求。多个线程同时需要同一个
+        目录时，只有一个线程发起 mkdir，其余线程等待其结果。
+
+        Args:
+            path (str): 远程目录路径
+
+        Returns:
+            bool: 目录存在或创建成功时返回 True
+        """
+        with self._ensured_dirs_lock:
+            if path in self._ensured_dirs:
+                return True
+            event = self._pending_dirs.get(path)
+            owner = event is None
+            if owner:
+                event = self._pending_dirs[path] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._ensured_dirs_lock:
+                return path in self._ensured_dirs
+
+        created = False
+        try:
+            created = self.create_directory(path)
+        finally:
+            with self._ensured_dirs_lock:
+                if created:
+                    parent = path.rstrip("/")
+                    while parent and parent not in self._ensured_dirs:
+                        self._ensured_dirs.add(parent)
+                        parent = parent.rsplit("/", 1)[0]
+                del self._pending_dirs[path]
+            event.set()
+        return created
+
     def create_directory(self, path):
         """
         在 OpenList 服务器上创建目录。
@@ -393,77 +1930,90 @@ class OpenListDownloader:
         Args:
             path (str): 要创建的远程目录路径
         """
-        # 使用直接的requests而不是session，确保使用正确的认证方式
-        headers = {
-            "Authorization": self.token,  # 使用原始token而不是Bearer格式
-            "Content-Type": "application/json",
-            "User-Agent": "openlist-downloader/1.0"
-        }
-            
-        url = f"{self.openlist_url}/api/fs/mkdir"
         payload = {
             "path": path,
             "password": ""
         }
         
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=self.timeout)
-            
-            # 安全地解析 JSON
-            data = None
-            try:
-                data = resp.json()
-            except ValueError:
+            resp, data = self._api_post("/api/fs/mkdir", payload)
+            if data is None:
                 response_preview = resp.text[:500] if resp.text else "Empty response"
-                self.print(f"[ERROR] 创建目录失败，非 JSON 响应（状态 {resp.status_code}）：{response_preview!r}")
+                self.log.error("[ERROR] 创建目录失败，非 JSON 响应（状态 %s）：%r", resp.status_code, response_preview)
                 return False
             
             if resp.status_code == 200 and data.get("code") == 200:
-                self.print(f"[INFO] 创建目录成功: {path}")
+                self.log.info("[INFO] 创建目录成功: %s", path)
                 return True
             elif data and "already exists" in data.get("message", ""):
                 # 目录已存在，这不是错误
                 return True
             elif resp.status_code == 401:
-                self.print(f"[ERROR] 认证失败: 令牌无效或已过期")
+                self.log.error("[ERROR] 认证失败: 令牌无效或已过期")
                 return False
             else:
-                self.print(f"[ERROR] 创建目录失败: {data}")
+                self.log.error("[ERROR] 创建目录失败: %s", data)
                 return False
+        except AuthenticationError:
+            raise
         except Exception as e:
-            self.print(f"[ERROR] 创建目录异常: {e}")
+            self.log.error("[ERROR] 创建目录异常: %s", e)
             return False
 
     def list_local_files(self, local_path):
         """
-        列出本地目录中的所有文件。
+        递归列出本地目录中的所有文件。
+
+        使用 os.scandir 以显式栈遍历：DirEntry 自带目录项类型，无需为每个条目
+        额外 stat；相对路径直接截取前缀得到，不再调用 os.path.relpath。
+        与 os.walk 一致，不进入指向目录的符号链接。
         
         Args:
             local_path (str): 本地目录路径
             
-        Returns:
-            list: 文件路径列表
+        Yields:
+            tuple: (完整路径, 相对于 local_path 的路径)，边遍历边产出，
+            调用方可以在遍历完成前就开始提交上传任务
         """
-        files = []
-        for root, _, filenames in os.walk(local_path):
-            for filename in filenames:
-                full_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(full_path, local_path)
-                files.append((full_path, rel_path))
-        return files
+        prefix_len = len(os.path.join(local_path, ""))
+        stack = [local_path]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                    else:
+                        yield entry.path, entry.path[prefix_len:]
 
-    def run(self, list_only=False, download_only=False, upload_only=False, workers=10):
+    def run(self, list_only=False, download_only=False, upload_only=False, workers=10, use_async=False,
+            list_workers=None, download_workers=None, direct_io=None):
         """
         运行下载器进程。
         
         协调文件列出和下载的主要方法。
         
         Args:
-            list_only (bool): 如果为 True，则仅列出文件并保存到 filelist.json
-            download_only (bool): 如果为 True，则跳过列目录并从现有的 filelist.json 下载
+            list_only (bool): 如果为 True，则仅列出文件并保存到 filelist.jsonl
+            download_only (bool): 如果为 True，则跳过列目录并从现有的 filelist.jsonl 下载
             upload_only (bool): 如果为 True，则只上传文件
-            workers (int): 并发下载线程数。默认为 10。
+            workers (int): 并发上传/下载线程数。默认为 10。
+            use_async (bool): 如果为 True，则使用 asyncio + aiohttp 下载（需要安装 aiohttp 和 aiofiles）
+            list_workers (int): 并发列目录的线程数。默认为配置中的 list_workers。
+            download_workers (int): 并发下载数。默认与 workers 相同。
+            direct_io (bool): 大文件是否以 O_DIRECT 写盘。默认为配置中的 direct_io。
         """
+        # 列目录受延迟限制、下载受带宽限制，两者的最佳并发数不同，分开设置
+        if list_workers:
+            self.list_workers = list_workers
+        download_workers = download_workers or workers
+        if direct_io is not None:
+            self.direct_io = direct_io
+        self._mount_adapters(max(workers, download_workers, self.list_workers))
+        # 每个后台写盘的文件最多同时占用 队列深度 + 正在写盘 + 等待入队 个缓冲区，
+        # 池的上限按此计算，大文件不会借光缓冲区而让其他下载线程阻塞在 get() 上
+        self._buffer_pool = _BufferPool(COPY_BUFFER_SIZE, download_workers * (WRITE_BEHIND_DEPTH + 2))
+        self._host_limiter = _HostLimiter(self.log, download_workers)
         self.login()
 
         if upload_only:
@@ -477,65 +2027,179 @@ class OpenListDownloader:
             if not os.path.exists(local_upload_path):
                 raise FileNotFoundError(f"本地上传目录不存在: {local_upload_path}")
                 
-            self.print(f"[INFO] 📤 开始上传文件从 {local_upload_path} 到 {remote_upload_path}")
-            local_files = self.list_local_files(local_upload_path)
-            
-            if not local_files:
-                self.print("[WARN] ⚠️ 未找到要上传的文件。")
-                return
-                
-            self.print(f"[INFO] 📋 总共找到 {len(local_files)} 个文件")
-            
+            self.log.info("[INFO] 📤 开始上传文件从 %s 到 %s", local_upload_path, remote_upload_path)
             with ThreadPoolExecutor(max_workers=workers) as executor:
+                # 边遍历本地目录边提交，枚举与上传请求重叠进行
                 futures = []
-                for local_file, rel_path in local_files:
-                    remote_file = os.path.join(remote_upload_path, rel_path).replace("\\", "/")
+                remote_base = remote_upload_path.rstrip("/") + "/"
+                for local_file, rel_path in self.list_local_files(local_upload_path):
+                    if os.sep != "/":
+                        rel_path = rel_path.replace(os.sep, "/")
+                    remote_file = remote_base + rel_path
                     futures.append(executor.submit(self.upload_file, local_file, remote_file))
-                    
+
+                if not futures:
+                    self.log.warning("[WARN] ⚠️ 未找到要上传的文件。")
+                    return
+
+                self.log.info("[INFO] 📋 总共找到 %s 个文件", len(futures))
+
                 completed = 0
                 total = len(futures)
-                for _ in as_completed(futures):
+                for future in as_completed(futures):
+                    # upload_file 自己处理单个文件的错误，这里只会抛出认证失败
+                    future.result()
                     completed += 1
                     if completed % 10 == 0 or completed == total:
-                        self.print(f"[PROGRESS] 📤 {completed}/{total}")
+                        self.log.info("[PROGRESS] 📤 %s/%s", completed, total)
                         
-            self.print("[INFO] 🎉 所有上传完成！")
+            self.log.info("[INFO] 🎉 所有上传完成！")
             return
 
         if download_only:
-            self.print("[INFO] 📥 使用现有的 filelist.json")
-            all_files = self.load_filelist()
-            if not all_files:
-                raise FileNotFoundError("未找到 filelist.json。请先不带 --download-only 参数运行。")
+            self.log.info("[INFO] 📥 使用现有的 %s", FILELIST_PATH)
+            files = self.load_filelist()
+            if files is None:
+                raise FileNotFoundError(f"未找到 {FILELIST_PATH}。请先不带 --download-only 参数运行。")
+            total = _count_lines(FILELIST_PATH)
         else:
-            self.print(f"[INFO] 🚀 正在列出目录：{self.remote_path}")
-            all_files = self.list_dir(self.remote_path)
-            self.save_filelist(all_files)
+            # 列目录的结果边列出边写入文件列表，下载时再逐条读回，整个列表不会驻留内存
+            self.log.info("[INFO] 🚀 正在列出目录：%s", self.remote_path)
+            with self._filelist_writer() as write:
+                total = self.list_dir(self.remote_path, on_file=write)
             if list_only:
-                self.print("[INFO] 📋 仅列出模式。正在退出。")
+                self.log.info("[INFO] 📋 仅列出模式。正在退出。")
                 return
+            files = self.load_filelist()
+
+        if not total:
+            self.log.warning("[WARN] ⚠️ 未找到文件。")
+            return
 
-        if not all_files:
-            self.print("[WARN] ⚠️ 未找到文件。")
+        self.log.info("[INFO] 📋 总文件数：%s", total)
+        progress = _Progress(self.log, total)
+        base = (self.local_save_dir or ".").rstrip("/" + os.sep)
+        local_index = self._local_index(base) if self.skip_existing else None
+        self._base_path = self._fetch_base_path()
+        tasks = _group_by_host(self._download_tasks(files, base, local_index, progress))
+
+        if use_async and aiohttp is None:
+            self.log.warning("[WARN] ⚠️ 未安装 aiohttp/aiofiles，回退到多线程下载。")
+            use_async = False
+
+        if use_async:
+            self.log.info("[INFO] ⚙️ 使用异步下载，并发数 %s", download_workers)
+            # asyncio.run 需要 Python 3.7，这里手动创建并关闭事件循环
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self._download_all_async(tasks, download_workers, progress))
+            finally:
+                loop.close()
+            self.log.info("[INFO] 🎉 所有下载完成！")
             return
 
-        self.print(f"[INFO] 📋 总文件数：{len(all_files)}")
-        self.print(f"[INFO] ⚙️ 使用 {workers} 个下载线程")
-
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = []
-            for file_info in all_files:
-                local_file = os.path.join(
-                    self.local_save_dir,
-                    os.path.relpath(file_info["path"], start="/")
-                )
-                futures.append(executor.submit(self.download_file, file_info["path"], local_file))
-
-            completed = 0
-            total = len(futures)
-            for _ in as_completed(futures):
-                completed += 1
-                if completed % 20 == 0 or completed == total:
-                    self.print(f"[PROGRESS] 📥 {completed}/{total}")
-
-        self.print("[INFO] 🎉 所有下载完成！")
\ No newline at end of file
+        self.log.info("[INFO] ⚙️ 使用 %s 个下载线程", download_workers)
+
+        def report(done):
+            # download_file 自己处理单个文件的错误，这里只会抛出认证失败，中止整个下载
+            for future in done:
+                future.result()
+            progress.advance(len(done))
+
+        with ThreadPoolExecutor(max_workers=download_workers) as executor:
+            # 只保持有限数量的任务在排队，文件列表按需读取，不会一次性创建所有 future
+            pending = set()
+            for task in tasks:
+                if len(pending) >= download_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    report(done)
+                pending.add(executor.submit(self.download_file, *task))
+            for future in as_completed(pending):
+                report([future])
+
+        self.log.info("[INFO] 🎉 所有下载完成！")
+
+    def _download_tasks(self, files, base, local_index=None, progress=None):
+        """
+        把文件字典逐个转换为下载任务的生成器。
+
+        提供 local_index 时，本地已有且大小一致的文件直接跳过，不再提交给
+        下载线程，也不再为它们单独 stat。
+
+        需要下载的文件所在的本地目录在分发前由调用线程逐个创建（每个目录一次），
+        下载线程之间不会再竞争同一目录树的 makedirs。目录创建失败时只记录错误并
+        跳过该文件，不会中断整个下载。
+
+        Args:
+            files (iterable): 文件字典的可迭代对象
+            base (str): 本地保存目录（末尾不带分隔符）
+            local_index (dict): _local_index 建立的 远程路径 -> 本地文件大小 索引，可选
+            progress (_Progress): 跳过的文件计入该进度，可选
+
+        Yields:
+            tuple: (remote_path, local_path, expected_size, direct_url, checked)
+        """
+        # 远程路径以 "/" 开头，直接拼接到本地目录之后，省去每个文件一次 os.path.relpath（内部会调用 getcwd）
+        to_local = str.maketrans("/", os.sep) if os.sep != "/" else None
+        for file_info in files:
+            remote_file = file_info["path"]
+            rel_path = remote_file if remote_file.startswith("/") else "/" + remote_file
+            if "/.." in rel_path:
+                # 服务器返回的名称或手工编辑的文件列表中带有 ".." 时规范化，
+                # 与原来的 os.path.relpath 一样不会写到本地保存目录之外
+                rel_path = posixpath.normpath(rel_path)
+            local_file = base + rel_path
+            if to_local:
+                local_file = local_file.translate(to_local)
+            # 旧版或手工编辑的文件列表中可能缺少 size，这些文件由 get_file_size 向服务器查询
+            size = file_info.get("size")
+            if local_index is not None and size and local_index.get(remote_file) == size:
+                self.log.info("[SKIP] ✅ 已存在：%s", local_file)
+                if progress is not None:
+                    progress.advance()
+                continue
+            try:
+                self._ensure_local_dir(os.path.dirname(local_file))
+            except OSError as e:
+                # 只放弃这一个文件（例如同名文件占用了目录路径、没有权限），其余文件照常下载
+                self.log.error("[ERROR] ❌ 无法创建目录，跳过 %s：%s", remote_file, e)
+                if progress is not None:
+                    progress.advance()
+                continue
+            # 索引中没有该文件或大小不一致时已可确定需要下载，download_file 无需再 stat；
+            # 缺少 size 的文件仍由 download_file 检查
+            checked = local_index is not None and size is not None
+            yield remote_file, local_file, size, self._direct_url(file_info), checked
+
+    def _local_index(self, base):
+        """
+        用 os.scandir 一次性遍历本地保存目录，建立已有文件的大小索引。
+
+        键为与远程路径相同形式的路径（以 "/" 开头、以 "/" 分隔），值为文件大小。
+        只对实际存在的文件 stat，不存在的文件和目录不产生任何系统调用；
+        未完成的 .part 临时文件不计入。
+
+        Args:
+            base (str): 本地保存目录
+
+        Returns:
+            dict: 远程路径 -> 本地文件大小
+        """
+        index = {}
+        stack = [(base or ".", "/")]
+        while stack:
+            dir_path, prefix = stack.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, prefix + entry.name + "/"))
+                        elif entry.is_file() and not entry.name.endswith(".part"):
+                            index[prefix + entry.name] = entry.stat().st_size
+                    except OSError:
+                        continue
+        return index
@@ -8,14 +8,15 @@ OpenList 下载器应用程序的主入口点。
 """
 
 import argparse
+import logging
 
 # 处理直接执行和模块执行两种情况的导入
 try:
     # 作为模块运行时
-    from .downloader import OpenListDownloader
+    from .downloader import LOGGER_NAME, OpenListDownloader, setup_logging, shutdown_logging
 except ImportError:
     # 直接作为脚本运行时
-    from downloader import OpenListDownloader
+    from downloader import LOGGER_NAME, OpenListDownloader, setup_logging, shutdown_logging
 
 
 def main():
@@ -26,26 +27,44 @@ def main():
     优雅地处理键盘中断和其他异常。
     """
     parser = argparse.ArgumentParser(description="OpenList 下载器")
-    parser.add_argument("--list-only", action="store_true", help="仅列出并保存 filelist.json")
-    parser.add_argument("--download-only", action="store_true", help="跳过列目录，使用 filelist.json")
+    parser.add_argument("--list-only", action="store_true", help="仅列出并保存 filelist.jsonl")
+    parser.add_argument("--download-only", action="store_true", help="跳过列目录，使用 filelist.jsonl")
     parser.add_argument("--upload-only", action="store_true", help="仅上传本地文件到远程目录")
     parser.add_argument("--workers", type=int, default=10, help="并发线程数(默认: 10)")
+    parser.add_argument("--list-workers", type=int, help="并发列目录线程数(默认: 配置中的 list_workers，32)")
+    parser.add_argument("--download-workers", type=int, help="并发下载数(默认: 与 --workers 相同)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用 asyncio + aiohttp 下载（需要安装 aiohttp 和 aiofiles）")
+    parser.add_argument("--direct-io", action="store_true", default=None,
+                        help="大文件以 O_DIRECT 写盘，绕过页缓存（默认: 配置中的 direct_io）")
     parser.add_argument("--config", default="config.json", help="配置文件路径 (默认: config.json)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出 DEBUG 调试信息")
     args = parser.parse_args()
 
+    setup_logging(verbose=args.verbose)
+    log = logging.getLogger(LOGGER_NAME)
+
     try:
         downloader = OpenListDownloader(config_path=args.config)
         downloader.run(
             list_only=args.list_only,
             download_only=args.download_only,
             upload_only=args.upload_only,
-            workers=args.workers
+            workers=args.workers,
+            use_async=args.use_async,
+            list_workers=args.list_workers,
+            download_workers=args.download_workers,
+            direct_io=args.direct_io
         )
     except KeyboardInterrupt:
-        print("\n[INFO] ⏹️ 用户中断。")
+        # 与其他日志走同一个队列，不会排到尚未写出的日志前面
+        log.info("\n[INFO] ⏹️ 用户中断。")
     except Exception as e:
-        print(f"[FATAL] 💥 {e}")
+        log.critical("[FATAL] 💥 %s", e)
         raise
+    finally:
+        # 回溯由解释器直接写入 stderr，先把队列中的日志全部写出
+        shutdown_logging()
 
 
 if __name__ == "__main__":